@@ -0,0 +1,782 @@
+from io import BytesIO
+import copy
+import hashlib
+import pandas as pd
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from xml.sax.saxutils import escape as xml_escape
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from PIL import Image as PILImage
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib import colors
+from reportlab.platypus import (
+    BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Image, Table, LongTable, TableStyle
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.utils import ImageReader
+
+# ===================== CONFIG VISUAL =====================
+PRIMARY = colors.HexColor("#0F3460")
+ACCENT  = colors.HexColor("#00A6A6")
+TEXT    = colors.HexColor("#1F2937")
+ZEBRA_1 = colors.whitesmoke
+ZEBRA_2 = colors.HexColor("#ffffff")
+BORDER  = colors.HexColor("#E5E7EB")
+
+BASE_FONT = "Helvetica"
+PAGE_SIZE = A4
+PAGE_W, PAGE_H = PAGE_SIZE
+MARGIN_TOP_MM = 24.0
+MARGIN_BOTTOM_MM = 18.0
+MARGIN_SIDE_MM = 14.0
+# Margens já convertidas para pontos
+LEFT_M = RIGHT_M = MARGIN_SIDE_MM * mm
+TOP_M = MARGIN_TOP_MM * mm
+BOTTOM_M = MARGIN_BOTTOM_MM * mm
+AVAIL_W = PAGE_W - (LEFT_M + RIGHT_M)  # largura útil do frame
+
+REPORT_TITLE = "Tratamento de Sementes (Resumo por Registro)"
+LOGO_URL = "https://app.agrireport.agr.br/customers/picture/16?time=1759945360"
+LOGO_HEIGHT_MM = 15.0
+IMG_MAX_W = 100 * mm
+IMG_MAX_H = 70 * mm
+SIGNATURE_MAX_H = 25 * mm
+IMG_DPI = 150  # resolução com que fotos/assinaturas são embutidas no PDF
+
+# Sessão HTTP compartilhada (reaproveita conexões keep-alive com o mesmo host)
+def _new_session():
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=16, pool_maxsize=64,
+        max_retries=Retry(total=2, backoff_factor=0.3),
+    ))
+    return session
+
+SESSION = _new_session()
+
+# Estilo dos blocos (produtos e grupos)
+BLOCK_BG = colors.HexColor("#F8FAFC")
+BLOCK_BORDER = colors.HexColor("#CBD5E1")
+PRODUCT_SPACER = 4 * mm  # pequeno espaço entre blocos
+
+# ===================== ESTILOS =====================
+@lru_cache(maxsize=1)
+def _build_styles():
+    """Monta a folha de estilos uma única vez; chamadas repetidas devolvem a mesma."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name="ReportTitle", parent=styles["Heading1"], fontName=BASE_FONT,
+        fontSize=12.5, leading=14, textColor=PRIMARY, spaceAfter=2, alignment=1
+    ))
+    styles.add(ParagraphStyle(
+        name="SectionTitle", parent=styles["Heading2"], fontName=BASE_FONT,
+        fontSize=9.8, leading=12, textColor=PRIMARY, spaceBefore=2, spaceAfter=2
+    ))
+    styles.add(ParagraphStyle(
+        name="Q", parent=styles["Normal"], fontName=BASE_FONT,
+        fontSize=8.6, leading=10.2, textColor=colors.HexColor("#111827")
+    ))
+    styles.add(ParagraphStyle(
+        name="A", parent=styles["Normal"], fontName=BASE_FONT,
+        fontSize=8.6, leading=10.2, textColor=colors.HexColor("#111827")
+    ))
+    styles.add(ParagraphStyle(
+        name="LabelSmall", parent=styles["Normal"], fontName=BASE_FONT,
+        fontSize=7.8, leading=9.6, textColor=colors.HexColor("#4B5563")
+    ))
+    styles.add(ParagraphStyle(
+        name="Value", parent=styles["Normal"], fontName=BASE_FONT,
+        fontSize=9.0, leading=11, textColor=colors.HexColor("#111827")
+    ))
+    return styles
+
+styles = _build_styles()
+
+# Estilos de tabela montados uma vez e compartilhados por todas as tabelas
+QA_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0,0), (-1,0), ACCENT),
+    ("TEXTCOLOR", (0,0), (-1,0), colors.white),
+    ("FONTNAME", (0,0), (-1,0), BASE_FONT),
+    ("FONTSIZE", (0,0), (-1,0), 8.2),
+    ("ALIGN", (0,0), (-1,0), "CENTER"),
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ("GRID", (0,0), (-1,-1), 0.25, BORDER),
+    ("ROWBACKGROUNDS", (0,1), (-1,-1), [ZEBRA_1, ZEBRA_2]),
+    ("LEFTPADDING", (0,0), (-1,-1), 3),
+    ("RIGHTPADDING", (0,0), (-1,-1), 3),
+    ("TOPPADDING", (0,0), (-1,-1), 2),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 2),
+])
+# Blocos de produto e grupos de informações gerais
+BLOCK_TABLE_STYLE = TableStyle([
+    ("BOX", (0,0), (-1,-1), 0.7, BLOCK_BORDER),
+    ("INNERGRID", (0,0), (-1,-1), 0.25, BLOCK_BORDER),
+    ("BACKGROUND", (0,0), (-1,-1), BLOCK_BG),
+    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ("LEFTPADDING", (0,0), (-1,-1), 4),
+    ("RIGHTPADDING", (0,0), (-1,-1), 4),
+    ("TOPPADDING", (0,0), (-1,-1), 3),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 3),
+])
+
+# ===================== FUNÇÕES AUXILIARES =====================
+def _fetch_bytes(url, timeout=15):
+    """Baixa o conteúdo bruto da URL, sem cache."""
+    resp = SESSION.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.content
+
+@lru_cache(maxsize=1)
+def _load_logo():
+    """
+    Baixa e decodifica o logo uma única vez. Devolve (ImageReader, largura, altura)
+    já no tamanho de desenho, ou None se o logo não puder ser carregado.
+    """
+    try:
+        reader = ImageReader(BytesIO(_fetch_bytes(LOGO_URL, timeout=10)))
+        img_w, img_h = reader.getSize()
+    except Exception:
+        return None
+    scale = min(1.0, LOGO_HEIGHT_MM*mm / img_h)  # só reduz, como o _restrictSize
+    return reader, img_w * scale, img_h * scale
+
+def header_footer(canvas, doc):
+    canvas.saveState()
+    canvas.setFillColor(ACCENT)
+    canvas.rect(0, PAGE_H - 15*mm, PAGE_W, 15*mm, stroke=0, fill=1)
+    logo = _load_logo()
+    if logo:
+        reader, logo_w, logo_h = logo
+        canvas.drawImage(reader, LEFT_M, PAGE_H - 20*mm + (15*mm - LOGO_HEIGHT_MM)/2,
+                         logo_w, logo_h, mask="auto")
+    canvas.setFont(BASE_FONT, 8)
+    canvas.drawRightString(PAGE_W - RIGHT_M, PAGE_H - 9*mm, f"Gerado em {doc.generated_at}")
+    canvas.restoreState()
+
+def _downscale_image(pim, data, width, height):
+    """
+    Reamostra a imagem para IMG_DPI no tamanho em que será impressa (width/height
+    em pontos) e recomprime: JPEG para fotos, PNG para imagens com transparência
+    (assinaturas). Devolve os bytes originais se a imagem já for pequena o bastante
+    ou se a redução falhar (ex.: PNG de 16 bits, que o thumbnail não aceita); nesse
+    caso o ReportLab embute a imagem original, como antes.
+    """
+    max_px = (max(1, round(width / 72 * IMG_DPI)), max(1, round(height / 72 * IMG_DPI)))
+    if pim.width <= max_px[0] and pim.height <= max_px[1]:
+        return data
+    try:
+        pim.thumbnail(max_px, PILImage.LANCZOS)
+        out = BytesIO()
+        if pim.mode in ("RGBA", "LA", "P"):
+            pim.save(out, "PNG", optimize=True)
+        else:
+            pim = pim if pim.mode in ("RGB", "L") else pim.convert("RGB")
+            pim.save(out, "JPEG", quality=80, optimize=True)
+    except Exception:
+        return data
+    return out.getvalue()
+
+def fetch_image(url, max_w=None, max_h=None, align_center=False, data=None):
+    if not url or not str(url).strip():
+        return None
+    try:
+        if data is None:
+            data = _fetch_bytes(url)
+        # Lê só o cabeçalho para obter as dimensões; decodifica apenas se precisar reduzir
+        with PILImage.open(BytesIO(data)) as pim:
+            iw, ih = pim.size
+            scale = 1.0
+            if max_w or max_h:
+                scale_w = (max_w / iw) if max_w else 1.0
+                scale_h = (max_h / ih) if max_h else 1.0
+                scale = min(scale_w, scale_h, 1.0)  # só reduz, como o _restrictSize
+            width, height = iw * scale, ih * scale
+            data = _downscale_image(pim, data, width, height)
+        img = Image(BytesIO(data), width=width, height=height)
+        if align_center:
+            img.hAlign = "CENTER"
+        return img
+    except Exception:
+        return None
+
+def is_url(s):
+    # Só o prefixo importa: testa direto e só minusculiza os 4 primeiros caracteres se precisar
+    if not isinstance(s, str):
+        return False
+    return s.startswith("http") or s.lstrip()[:4].lower() == "http"
+
+def looks_like_label(s): 
+    # Considera rótulos que contenham ':' ou '?' (pergunta ou rótulo tradicional)
+    return isinstance(s, str) and (":" in s or "?" in s)
+
+def normalize_value(v):
+    # Caminho rápido para o caso mais comum (texto); "v != v" detecta NaN
+    t = type(v)
+    if t is str:
+        return v.strip()
+    if v is None:
+        return ""
+    if t is float or isinstance(v, float):
+        if v != v:
+            return ""
+        return str(int(v)) if v.is_integer() else str(v)
+    return str(v).strip()
+
+def strip_accents(text: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFD", text)
+        if unicodedata.category(c) != "Mn"
+    )
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=4096)
+def canonical_key(label: str) -> str:
+    # Os mesmos rótulos se repetem em todas as linhas: cada um é normalizado uma vez
+    if label is None:
+        return ""
+    s = str(label).strip().lower()
+    s = s.replace("?", ":")  # normaliza "Pergunta?" para "Pergunta:"
+    s = s.replace(" :", ":")
+    if s.endswith(":"):
+        s = s[:-1]
+    s = strip_accents(s)
+    s = _WHITESPACE_RE.sub(" ", s)
+    return s
+
+# O Paragraph interpreta o texto como marcação: textos da planilha com <, > ou &
+# são escapados (uma vez) para não perderem trechos como "<cia>"
+_NEEDS_XML = re.compile(r"[<>&]")
+
+def _xml_text(text):
+    return xml_escape(text) if _NEEDS_XML.search(text) else text
+
+_LABEL_PARAGRAPHS = {}
+
+def label_paragraph(text, style_name):
+    """
+    Paragraph para rótulos que se repetem em todos os registros: o texto é analisado
+    uma única vez e cada chamada devolve uma cópia rasa, já que o ReportLab guarda
+    estado de layout no objeto durante o wrap.
+    """
+    key = (text, style_name)
+    par = _LABEL_PARAGRAPHS.get(key)
+    if par is None:
+        par = _LABEL_PARAGRAPHS[key] = Paragraph(_xml_text(text), styles[style_name])
+    return copy.copy(par)
+
+def text_paragraph(text, style_name):
+    """Paragraph de valor; o traço de campo vazio (o valor mais comum) sai do cache de label_paragraph."""
+    if text == "-":
+        return label_paragraph(text, style_name)
+    return Paragraph(_xml_text(text), styles[style_name])
+
+def pack_pairs_into_rows(pairs, pairs_per_row):
+    flat = [x for pair in pairs for x in pair]
+    cols = pairs_per_row * 2
+    rows = [flat[i:i + cols] for i in range(0, len(flat), cols)]
+    if rows and len(rows[-1]) < cols:
+        rows[-1] += [""] * (cols - len(rows[-1]))
+    return rows
+
+@lru_cache(maxsize=8)
+def _qa_col_widths(pairs_per_row, available_width):
+    """Larguras fixas das colunas Pergunta/Resposta; calculadas uma vez por layout."""
+    q_frac, a_frac = 0.35, 0.65
+    pair_unit = q_frac + a_frac
+    widths = []
+    for _ in range(pairs_per_row):
+        widths += [available_width * (q_frac/pair_unit) / pairs_per_row,
+                   available_width * (a_frac/pair_unit) / pairs_per_row]
+    return tuple(widths)
+
+def make_qa_table(pairs, pairs_per_row, available_width):
+    """
+    Cria tabela de Q&A. Aceita q/a como strings ou flowables (Paragraph/Image).
+    Idempotente: se já for Paragraph/Image, usa direto.
+    """
+    widths = _qa_col_widths(pairs_per_row, available_width)
+
+    header = ["Pergunta", "Resposta"] * pairs_per_row
+
+    formatted_pairs = []
+    for q, a in pairs:
+        q_par = q if isinstance(q, (Paragraph, Image)) else label_paragraph(str(q) if q is not None else "-", "Q")
+        if isinstance(a, (Paragraph, Image)):
+            a_par = a
+        else:
+            a_txt = str(a) if a is not None and str(a).strip() != "" else "-"
+            a_par = text_paragraph(a_txt, "A")
+        formatted_pairs.append((q_par, a_par))
+
+    data_rows = pack_pairs_into_rows(formatted_pairs, pairs_per_row)
+    # LongTable: mesma tabela, mas com o cálculo de quebra de página otimizado para muitas linhas
+    table = LongTable([header] + data_rows, colWidths=widths, hAlign="LEFT", repeatRows=1)
+    table.setStyle(QA_TABLE_STYLE)
+    return table
+
+# --------- Produtos: regex + campos esperados ---------
+PRODUCT_REGEX = re.compile(r"^produto\s*(\d+)\s*:\s*$", re.IGNORECASE)
+EXPECTED_PRODUCT_FIELDS = [
+    "Produto {n}:",
+    "Lote:",
+    "Dose (ml/100kg):",
+    "Utilizado (ml total):",
+]
+
+# Rótulos esperados de cada bloco de produto, formatados uma vez (n = 1..11)
+EXPECTED_LABELS_BY_N = {
+    n: [lbl.format(n=n) for lbl in EXPECTED_PRODUCT_FIELDS]
+    for n in range(1, 12)
+}
+EXPECTED_LABELS_SET_BY_N = {n: frozenset(v[1:]) for n, v in EXPECTED_LABELS_BY_N.items()}
+
+def _match_product(label):
+    """PRODUCT_REGEX.match no rótulo; nem roda o regex se ele não começa com 'produto'."""
+    s = str(label).strip()
+    return PRODUCT_REGEX.match(s) if s[:7].lower() == "produto" else None
+
+_BLANK_STRS = frozenset({"", "-", "n/a", "na", "null", "none"})
+
+def _is_blank_value(v) -> bool:
+    """Considera vazio quando None, '', '-' (após strip), ou NaN."""
+    if v is None:
+        return True
+    if isinstance(v, str):
+        return v.strip().lower() in _BLANK_STRS
+    if isinstance(v, float):
+        return math.isnan(v)
+    if isinstance(v, (Image, Paragraph)):
+        return False
+    return str(v).strip().lower() in _BLANK_STRS
+
+def extract_products_and_rest(pairs, max_products=11):
+    """
+    Separa blocos de produtos (Produto n:, Lote:, Dose..., Utilizado...) do restante.
+    - products: lista de dicts {"n": int, "items": [(Q_flowable, A_flowable), ...]}
+      **Somente produtos com AO MENOS UM valor não-vazio entram.**
+    - rest: lista de (q, a) CRUS (string/flowable) não pertencentes aos blocos.
+      Campos de produtos vazios também são removidos do 'rest' (não aparecem no PDF).
+    """
+    products = []
+    rest = []
+    i = 0
+    total = len(pairs)
+    stripped = [str(q).strip() for q, _ in pairs]  # rótulos limpos uma vez só
+
+    # Uma única passada: pares fora dos blocos de produto vão direto para 'rest', na ordem original
+    while i < total:
+        q, a = pairs[i]
+        m = _match_product(stripped[i])
+        if m and len(products) < max_products:
+            n = int(m.group(1))
+            if n in EXPECTED_LABELS_BY_N:
+                expected_labels = EXPECTED_LABELS_BY_N[n]
+                expected_set = EXPECTED_LABELS_SET_BY_N[n]
+            else:  # numeração fora de 1..11
+                expected_labels = [lbl.format(n=n) for lbl in EXPECTED_PRODUCT_FIELDS]
+                expected_set = frozenset(expected_labels[1:])
+            collected = {lbl: None for lbl in expected_labels}
+            collected[expected_labels[0]] = a
+
+            j = i + 1
+            while j < total:
+                qj, aj = pairs[j]
+                qj_s = stripped[j]
+                if _match_product(qj_s):
+                    break  # próximo produto
+                if qj_s in expected_set:
+                    collected[qj_s] = aj
+                else:
+                    rest.append((qj, aj))
+                j += 1
+
+            # Checagem de "produto vazio": todos os 4 campos sem conteúdo real
+            has_any_answer = any(not _is_blank_value(collected[lbl]) for lbl in expected_labels)
+            if has_any_answer:
+                # Monta os itens do bloco (flowables) na ordem esperada
+                items = []
+                for lbl in expected_labels:
+                    val = collected[lbl]
+                    lbl_par = label_paragraph(lbl, "Q")
+                    if isinstance(val, Image):
+                        items.append((lbl_par, val))
+                    elif isinstance(val, Paragraph):
+                        items.append((lbl_par, val))
+                    else:
+                        items.append((lbl_par, text_paragraph((str(val).strip() if not _is_blank_value(val) else "-"), "A")))
+                products.append({"n": n, "items": items})
+            # Se for vazio: não adiciona aos produtos e os campos dele também
+            # não aparecem em "demais campos"
+            i = j
+            continue
+        # Demais pares — manter CRU
+        rest.append((q, a))
+        i += 1
+
+    products.sort(key=lambda d: d["n"])
+    return products, rest
+
+def make_product_block_table(product_items, available_width):
+    """
+    Bloco (tabela 2 col) para um único produto.
+    """
+    q_frac, a_frac = 0.35, 0.65
+    widths = [available_width * q_frac, available_width * a_frac]
+    return Table(product_items, colWidths=widths, hAlign="LEFT", style=BLOCK_TABLE_STYLE)
+
+# --------- NOVO: grupos de informações gerais ---------
+GROUPS = [
+    ["Data", "Máquina TS", "Supervisor OTM"],
+    ["Canal", "Cidade", "UF", "Consultor Responsável"],
+    ["Empresa Contratante", "Produtor", "Telefone do Produtor", "Cidade", "UF"],
+    ["Cultura", "Variedade", "Lote", "Empresa", "Tipo", "Peso Total"],
+]
+
+SYNONYMS = {
+    "data": ["data", "data aplicação", "data do ts", "data da aplicação"],
+    "maquina ts": ["maquina ts", "máquina ts", "maquina de ts"],
+    "supervisor otm": ["supervisor otm", "supervisor", "otm supervisor"],
+
+    "canal": ["canal"],
+    "cidade": ["cidade", "municipio", "município"],
+    "uf": ["uf", "estado", "sigla uf"],
+    "consultor responsavel": ["consultor responsavel", "consultor responsável", "responsavel tecnico", "responsável técnico"],
+
+    "empresa contratante": ["empresa contratante", "contratante"],
+    "produtor": ["produtor", "nome do produtor"],
+    "telefone do produtor": ["telefone do produtor", "telefone produtor", "telefone"],
+    "cultura": ["cultura"],
+    "variedade": ["variedade", "cultivar"],
+    "lote": ["lote", "lote geral"],
+    "empresa": ["empresa", "empresa ts", "empresa executora"],
+    "tipo": ["tipo"],
+    "peso total": ["peso total", "peso", "peso total (kg)"],
+}
+
+# Sinônimos já normalizados, calculados uma vez na importação (isso também deixa
+# o cache de canonical_key pronto para os rótulos mais comuns)
+CANON_SYNONYMS = {target: tuple(canonical_key(s) for s in syns) for target, syns in SYNONYMS.items()}
+
+def canon_from_display(label: str) -> str:
+    return canonical_key(label)
+
+def _canon_synonyms_uncached(wanted_display_label):
+    target = canon_from_display(wanted_display_label)
+    return CANON_SYNONYMS.get(target, (target,))
+
+# Rótulos de exibição dos GROUPS -> sinônimos canônicos: um único acesso ao dict por campo
+_DISPLAY_TO_CANON = {lbl: _canon_synonyms_uncached(lbl) for group in GROUPS for lbl in group}
+
+def _canon_synonyms(wanted_display_label):
+    syns = _DISPLAY_TO_CANON.get(wanted_display_label)
+    return syns if syns is not None else _canon_synonyms_uncached(wanted_display_label)
+
+def build_lookup(pairs):
+    """
+    Recebe os pares crus (rótulo sempre str, vindo da planilha).
+    index: lista dos pares (posições consumidas viram None);
+    pockets: chave canônica -> posições no index.
+    """
+    index = list(pairs)
+    pockets = {}
+    for i, (q, _) in enumerate(index):
+        k = canonical_key(q)
+        pockets.setdefault(k, []).append(i)
+    return index, pockets
+
+def remaining_pairs_of(index):
+    """Pares do index ainda não consumidos por pop_first_matching, na ordem original."""
+    return [p for p in index if p is not None]
+
+def pop_first_matching(index, pockets, wanted_display_label):
+    for s in _canon_synonyms(wanted_display_label):
+        pocket = pockets.get(s)
+        if pocket:
+            idx = pocket.pop(0)
+            q, a = index[idx]
+            index[idx] = None
+            if not pocket:
+                del pockets[s]
+            return q, a
+    return None, None
+
+def make_inline_group_block(labels_order, index, pockets, available_width):
+    n = len(labels_order)
+    if n == 0:
+        return None, []
+
+    original_pairs = []
+    values = []
+    for lbl in labels_order:
+        q, a = pop_first_matching(index, pockets, lbl)
+        original_pairs.append((q, a))
+        values.append(a)
+
+    col_w = available_width / n
+    col_widths = [col_w for _ in range(n)]
+
+    top_row = [label_paragraph(lbl, "LabelSmall") for lbl in labels_order]
+
+    bottom_row = []
+    for a in values:
+        if isinstance(a, (Paragraph, Image)):
+            bottom_row.append(a)
+        else:
+            txt = str(a).strip() if a is not None and str(a).strip() != "" else "-"
+            bottom_row.append(text_paragraph(txt, "Value"))
+
+    tbl = Table([top_row, bottom_row], colWidths=col_widths, hAlign="LEFT")
+    tbl.setStyle(BLOCK_TABLE_STYLE)
+    return tbl, original_pairs
+
+# ===================== VARREDURA DA LINHA =====================
+# Trechos que identificam os campos de imagem conhecidos
+IMAGE_FIELD_TAGS = (
+    "foto 1: semente tratada e não tratada",
+    "foto 2: embalagem dos produtos",
+    "assinatura do produtor ou responsável",
+)
+
+# Um único regex (sem distinção de maiúsculas) no lugar de um teste de substring por trecho
+IMAGE_FIELD_RE = re.compile("|".join(re.escape(tag) for tag in IMAGE_FIELD_TAGS), re.IGNORECASE)
+SIGNATURE_RE = re.compile("assinatura", re.IGNORECASE)
+
+def _normalize_column(col):
+    """normalize_value aplicado à coluna inteira; vetorizado para colunas numéricas e de texto."""
+    if pd.api.types.is_float_dtype(col):
+        whole = (col % 1 == 0) & (col.abs() < 2**53)
+        out = col.astype(str)
+        out[whole] = col[whole].astype("int64").astype(str)
+        big = (col % 1 == 0) & ~whole
+        out[big] = col[big].map(normalize_value)
+        out[col.isna()] = ""
+        return out.tolist()
+    if pd.api.types.is_integer_dtype(col) or pd.api.types.is_bool_dtype(col):
+        return col.astype(str).tolist()
+    if pd.api.types.is_string_dtype(col):
+        return col.str.strip().fillna("").tolist()
+    missing = col.isna().tolist()  # inclui NaT de colunas de data
+    return [
+        "" if m else normalize_value(v)
+        for v, m in zip(col.to_numpy(dtype=object, copy=False), missing)
+    ]
+
+def _label_column(col):
+    """looks_like_label aplicado à coluna inteira."""
+    if not (pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)):
+        return [False] * len(col)
+    try:
+        return col.str.contains(r"[:?]", regex=True, na=False).astype(bool).tolist()
+    except AttributeError:
+        # coluna object sem nenhum texto
+        return [False] * len(col)
+
+def normalize_frame(df):
+    """
+    Pré-processa as linhas de dados de uma vez, coluna a coluna em pandas,
+    em vez de célula a célula no laço de cada registro.
+    Devolve (valores, rótulos): listas de linhas com os valores já normalizados
+    e, para cada célula, se ela é um rótulo (looks_like_label).
+    """
+    df = df.infer_objects()
+    value_cols = [_normalize_column(df[c]) for c in df.columns]
+    label_cols = [_label_column(df[c]) for c in df.columns]
+    return [list(r) for r in zip(*value_cols)], [list(r) for r in zip(*label_cols)]
+
+_DROP_NEWLINES = str.maketrans("", "", "\n\r")
+
+def iter_label_values(values, labels):
+    """
+    Varre as células (já normalizadas) da linha e devolve pares (rótulo, valor).
+    Uma célula é rótulo quando marcada em `labels`; o valor é a célula seguinte.
+    """
+    drop_newlines = _DROP_NEWLINES  # local: evita a busca global a cada célula
+    i = 0
+    n = len(values)
+    while i < n:
+        if labels[i] and i + 1 < n:
+            yield values[i], values[i+1].translate(drop_newlines).strip()
+            i += 2
+        else:
+            i += 1
+
+def collect_image_urls(row_values, row_labels):
+    """URLs dos campos de imagem conhecidos (fotos e assinatura) de uma linha."""
+    image_field = IMAGE_FIELD_RE.search
+    return [
+        value for label, value in iter_label_values(row_values[9:], row_labels[9:])
+        if image_field(label) and is_url(value)
+    ]
+
+def _download_or_none(url):
+    try:
+        return _fetch_bytes(url)
+    except Exception:
+        return None
+
+def prefetch_images(urls, max_workers=16):
+    """
+    Baixa as URLs em paralelo (threads; trabalho limitado por rede), sem cache entre
+    chamadas, e devolve {url: bytes}. URLs que falharem ficam de fora (o campo mostra
+    a URL como texto).
+    """
+    unique = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = executor.map(_download_or_none, unique)
+        return {url: data for url, data in zip(unique, fetched) if data is not None}
+
+def iter_row_images(urls_by_row, max_workers=16):
+    """
+    Versão em pipeline do prefetch_images: baixa as URLs de todas as linhas em paralelo
+    e devolve (índice da linha, {url: bytes}) assim que a última imagem daquela linha
+    chega, para a geração do PDF começar enquanto o resto ainda baixa. Linhas sem
+    imagem saem primeiro. Cada URL é baixada uma vez, mesmo se repetida entre linhas,
+    e URLs diferentes com o mesmo conteúdo (SHA-256) compartilham um único objeto bytes.
+    """
+    waiting = {}  # url -> linhas que dependem dela
+    pending = []  # quantas URLs ainda faltam em cada linha
+    for row, urls in enumerate(urls_by_row):
+        unique = set(urls)
+        pending.append(len(unique))
+        for url in unique:
+            waiting.setdefault(url, []).append(row)
+        if not unique:
+            yield row, {}
+
+    images, by_digest = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_download_or_none, url): url for url in waiting}
+        for future in as_completed(futures):
+            url = futures[future]
+            data = future.result()
+            if data is not None:
+                images[url] = by_digest.setdefault(hashlib.sha256(data).digest(), data)
+            for row in waiting[url]:
+                pending[row] -= 1
+                if not pending[row]:
+                    yield row, {u: images[u] for u in urls_by_row[row] if u in images}
+
+# ===================== GERAÇÃO DE UM REGISTRO =====================
+# Moldura e modelo de página montados uma vez e reaproveitados em todos os documentos
+# (o ReportLab reinicia os frames a cada página)
+BODY_FRAME = Frame(LEFT_M, BOTTOM_M, AVAIL_W, PAGE_H - (TOP_M + BOTTOM_M), id="normal")
+PAGE_TEMPLATE = PageTemplate(id="relatorio", frames=[BODY_FRAME], onPage=header_footer, pagesize=PAGE_SIZE)
+
+def _new_doc(buf):
+    """Documento do relatório (página, margens, título fixos) escrevendo em `buf`."""
+    return BaseDocTemplate(
+        buf,
+        pagesize=PAGE_SIZE,
+        pageTemplates=[PAGE_TEMPLATE],
+        leftMargin=LEFT_M, rightMargin=RIGHT_M,
+        topMargin=TOP_M, bottomMargin=BOTTOM_M,
+        title=REPORT_TITLE,
+    )
+
+def render_one(row_values, row_labels, r_index, images=None):
+    """
+    Gera o PDF de uma linha da planilha e devolve (reg_id, bytes do PDF).
+    Função de nível de módulo para poder rodar em processos separados
+    (ProcessPoolExecutor); usa apenas valores primitivos como entrada.
+    `row_values`/`row_labels` vêm de normalize_frame; `images` é um dict
+    opcional {url: bytes} já baixado (ver iter_row_images).
+    """
+    # Sem `images` (chamada avulsa), as imagens da linha são baixadas aqui, em paralelo.
+    # Com `images`, as URLs ausentes já falharam no download de origem e não são
+    # tentadas de novo: aparecem como texto (a URL)
+    if images is None:
+        images = prefetch_images(collect_image_urls(row_values, row_labels), max_workers=6)
+
+    # REG_ID e outros campos que existem antes da coluna J devem ser lidos da linha completa
+    reg_id = row_values[4] if len(row_values) > 0 else f"registro_{r_index - 1}"
+
+    pairs = []
+
+    # Campo fixo de exemplo (mantendo posição original: coluna C -> índice 2)
+    user_name = row_values[8] if len(row_values) > 2 else "-"
+    pairs.append(("Usuário:", user_name))
+
+    # --- AQUI: lemos apenas a partir da coluna J (índice 9) para montar os pares Q/A ---
+    # Funções usadas a cada célula ficam em variáveis locais (evita buscas globais/de atributo)
+    image_field, signature_field, add_pair = IMAGE_FIELD_RE.search, SIGNATURE_RE.search, pairs.append
+    for label, value in iter_label_values(row_values[9:], row_labels[9:]):
+        if image_field(label) and is_url(value):
+            data = images.get(value)
+            if data is None:
+                img_obj = None
+            elif signature_field(label):
+                img_obj = fetch_image(value, max_w=IMG_MAX_W, max_h=SIGNATURE_MAX_H, align_center=True, data=data)
+            else:
+                img_obj = fetch_image(value, max_w=IMG_MAX_W, max_h=IMG_MAX_H, data=data)
+            add_pair((label, img_obj if img_obj else value))
+            continue
+
+        add_pair((label, value if value else "-"))
+
+    # 1) Separar blocos de produto (1..11) e demais perguntas
+    products, rest_pairs = extract_products_and_rest(pairs, max_products=11)
+
+    # 2) Dentro de "demais perguntas", organizar os grupos pedidos
+    index, pockets = build_lookup(rest_pairs)
+
+    # ===== Montagem do PDF =====
+    story = [Paragraph(f"Registro {_xml_text(str(reg_id))}", styles["ReportTitle"]), Spacer(1, 3)]
+
+    # (A) Grupos visuais das "demais informações"
+    story.append(Paragraph("Informações Gerais", styles["SectionTitle"]))
+    for group in GROUPS:
+        tbl, _ = make_inline_group_block(group, index, pockets, AVAIL_W)
+        if tbl:
+            story.append(tbl)
+            story.append(Spacer(1, PRODUCT_SPACER))
+
+    # (B) O que sobrar das "demais informações" vai para Q&A padrão
+    remaining_pairs = remaining_pairs_of(index)  # ainda crus
+    if remaining_pairs:
+        story.append(Paragraph("Detalhes", styles["SectionTitle"]))
+        qa_table = make_qa_table(remaining_pairs, 1, AVAIL_W)
+        story += [qa_table, Spacer(1, 3)]
+
+    # (C) Depois os blocos de produto (apenas os com resposta)
+    if products:
+        story.append(Paragraph("Especificações dos Produtos", styles["SectionTitle"]))
+        for p in products:
+            block_tbl = make_product_block_table(p["items"], AVAIL_W)
+            story.append(block_tbl)
+            story.append(Spacer(1, PRODUCT_SPACER))
+        story.append(Spacer(1, PRODUCT_SPACER))
+
+    pdf_buffer = BytesIO()
+    doc = _new_doc(pdf_buffer)
+    doc.generated_at = datetime.now().strftime("%d/%m/%Y %H:%M")  # uma vez por documento
+    doc.build(story)
+    return reg_id, pdf_buffer.getvalue()
+
+def iter_rendered(executor, values_rows, label_rows, urls_by_row):
+    """
+    Pipeline completo: envia cada linha ao pool (render_one) assim que as imagens dela
+    chegam (iter_row_images) e devolve (reg_id, bytes do PDF) na ordem em que os
+    registros terminam. PDFs prontos já saem entre um download e outro, sem esperar
+    o fim de todos os downloads, e cada resultado só fica referenciado aqui até ser
+    devolvido.
+    """
+    pending = set()
+    for row, imgs in iter_row_images(urls_by_row):
+        pending.add(executor.submit(render_one, values_rows[row], label_rows[row], row + 2, imgs))
+        done = {f for f in pending if f.done()}
+        pending -= done
+        while done:
+            yield done.pop().result()
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        while done:
+            yield done.pop().result()